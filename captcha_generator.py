@@ -9,11 +9,81 @@ import argparse
 import yaml
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from enhanced_captcha import EnhancedImageCaptcha
 
 
+# Per-process generator state, set up once by _init_worker
+_worker_captcha: Optional[EnhancedImageCaptcha] = None
+_worker_part: str = ''
+_worker_config: Dict[str, Any] = {}
+
+
+def _build_captcha(part_config: Dict[str, Any], part: str,
+                   verbose: bool = True) -> EnhancedImageCaptcha:
+    """Create a CAPTCHA generator with part-specific settings."""
+    return EnhancedImageCaptcha(
+        width=part_config.get('width', 160),
+        height=part_config.get('height', 60),
+        fonts=part_config.get('fonts', None),
+        font_sizes=tuple(part_config.get('font_sizes', [30, 36, 42, 48])),
+        difficulty=part,
+        png_compress_level=part_config.get('png_compress_level', 1),
+        verbose=verbose
+    )
+
+
+def _init_worker(part_config: Dict[str, Any], part: str) -> None:
+    """Create the CAPTCHA generator once per worker process."""
+    global _worker_captcha, _worker_part, _worker_config
+    _worker_part = part
+    _worker_config = part_config
+    # The parent has already reported the configuration; stay quiet here
+    _worker_captcha = _build_captcha(part_config, part, verbose=False)
+
+
+def _generate_one(args: Tuple[int, str]) -> Optional[Dict[str, Any]]:
+    """Generate and save a single sample; returns its label, or None on failure."""
+    i, images_dir = args
+    part_config = _worker_config
+
+    # Generate image filename
+    image_id = f"{i+1:06d}"
+    image_filename = f"{image_id}.png"
+    image_path = os.path.join(images_dir, image_filename)
+
+    # Generate CAPTCHA text (3-7 characters)
+    min_length = part_config.get('min_length', 3)
+    max_length = part_config.get('max_length', 7)
+    text_length = min_length + (i % (max_length - min_length + 1))
+
+    captcha_text = _worker_captcha.generate_text(text_length)
+
+    # Generate and save image
+    try:
+        _worker_captcha.write(
+            chars=captcha_text,
+            output=image_path,
+            format='PNG',
+            bg_color=part_config.get('bg_color', None),
+            fg_color=part_config.get('fg_color', None)
+        )
+    except Exception as e:
+        print(f"  Error generating image {image_id}: {e}")
+        return None
+
+    return {
+        "height": part_config.get('height', 60),
+        "width": part_config.get('width', 160),
+        "image_id": image_id,
+        "captcha_string": captcha_text,
+        "filename": image_filename,
+        "difficulty": _worker_part
+    }
+
+
 class CaptchaGenerator:
     def __init__(self, config_path: str):
         """Initialize the CAPTCHA generator with configuration."""
@@ -36,59 +106,30 @@ class CaptchaGenerator:
         images_dir = part_dir / 'images'
         images_dir.mkdir(parents=True, exist_ok=True)
         
-        # Initialize CAPTCHA generator with part-specific settings
-        captcha = EnhancedImageCaptcha(
-            width=part_config.get('width', 160),
-            height=part_config.get('height', 60),
-            fonts=part_config.get('fonts', None),
-            font_sizes=tuple(part_config.get('font_sizes', [30, 36, 42, 48])),
-            difficulty=part
-        )
-        
-        # Generate CAPTCHAs
+        # Report the generator setup and font loading once, in this process;
+        # the workers below build their own generators quietly
+        reporter = _build_captcha(part_config, part)
+        reporter.load_fonts()
+
+        # Generate CAPTCHAs in parallel; samples share no state, so each
+        # worker process builds its own generator and writes its own files
         labels = []
         num_samples = part_config.get('num_samples', 1000)
-        
-        for i in range(num_samples):
-            # Generate image filename
-            image_id = f"{i+1:06d}"
-            image_filename = f"{image_id}.png"
-            image_path = images_dir / image_filename
-            
-            # Generate CAPTCHA text (3-7 characters)
-            min_length = part_config.get('min_length', 3)
-            max_length = part_config.get('max_length', 7)
-            text_length = min_length + (i % (max_length - min_length + 1))
-            
-            captcha_text = captcha.generate_text(text_length)
-            
-            # Generate and save image
-            try:
-                captcha.write(
-                    chars=captcha_text,
-                    output=str(image_path),
-                    format='PNG',
-                    bg_color=part_config.get('bg_color', None),
-                    fg_color=part_config.get('fg_color', None)
-                )
-                
-                # Add to labels
-                labels.append({
-                    "height": part_config.get('height', 60),
-                    "width": part_config.get('width', 160),
-                    "image_id": image_id,
-                    "captcha_string": captcha_text,
-                    "filename": image_filename,
-                    "difficulty": part
-                })
-                
+        workers = self.config.get('workers', None) or os.cpu_count() or 1
+        # Enough chunks per worker to balance load, even for small parts
+        chunksize = max(1, num_samples // (4 * workers))
+
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(part_config, part)) as executor:
+            tasks = ((i, str(images_dir)) for i in range(num_samples))
+            for i, label in enumerate(executor.map(_generate_one, tasks, chunksize=chunksize)):
+                if label is not None:
+                    labels.append(label)
+
                 # Progress indicator
                 if (i + 1) % 100 == 0:
                     print(f"  Generated {i + 1}/{num_samples} images for {part}")
-                    
-            except Exception as e:
-                print(f"  Error generating image {image_id}: {e}")
-                continue
         
         # Save labels.json
         labels_path = part_dir / 'labels.json'
@@ -5,14 +5,23 @@ Extended from the original captcha library to support multiple difficulty levels
 """
 
 from __future__ import annotations
+import functools
+import json
 import os
+import random
 import secrets
 import typing as t
 import math
-from PIL.Image import new as createImage, Image, Transform, Resampling
+from PIL.Image import new as createImage, fromarray, Image
+try:
+    from PIL.Image import Transform, Resampling
+except ImportError:  # Pillow < 9.1, including current Pillow-SIMD releases
+    import PIL.Image as Transform  # module-level QUAD
+    import PIL.Image as Resampling  # module-level BILINEAR, BICUBIC
 from PIL.ImageDraw import Draw, ImageDraw
 from PIL.ImageFilter import SMOOTH, GaussianBlur
 from PIL.ImageFont import FreeTypeFont, truetype, load_default
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 import numpy as np
 
@@ -23,9 +32,106 @@ ColorTuple = t.Union[t.Tuple[int, int, int], t.Tuple[int, int, int, int]]
 # Character set for alphanumeric CAPTCHAs
 ALPHANUMERIC_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
+# OS-backed CSPRNG for the CAPTCHA text itself
+_sysrand = random.SystemRandom()
+
+# Non-cryptographic RNG for purely visual noise (text content still uses secrets)
+_noise_rng = np.random.default_rng()
+
+
+def _reseed_noise_rng() -> None:
+    """Give forked worker processes their own noise stream."""
+    global _noise_rng
+    _noise_rng = np.random.default_rng()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed_noise_rng)
+
+# Font discovery details are only printed when CAPTCHA_VERBOSE is set
+_VERBOSE = os.environ.get('CAPTCHA_VERBOSE', '') not in ('', '0')
+
+
+def _log(message: str) -> None:
+    """Print a diagnostic message when CAPTCHA_VERBOSE is enabled."""
+    if _VERBOSE:
+        print(message)
+
+
+# On-disk cache of the discovered font list, keyed by font directory mtimes
+_FONT_CACHE_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'captcha_fonts.json'
+)
+
+
+def _scan_font_dir(path: str, recursive: bool = True,
+                   visited: list | None = None) -> list[str]:
+    """Collect .ttf/.otf files under path with os.scandir (no per-file stat calls).
+
+    Every directory scanned is appended to visited as [path, mtime], so a
+    cached result can later be checked against the whole tree.
+    """
+    found = []
+    if visited is not None:
+        visited.append([path, os.path.getmtime(path)])
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    found.extend(_scan_font_dir(entry.path, visited=visited))
+            elif entry.name.lower().endswith(('.ttf', '.otf')):
+                found.append(entry.path)
+    return found
+
+
+def _read_font_cache(signature: list) -> list[str] | None:
+    """Return the cached font list if it was built for the same directory state.
+
+    Besides the top-level signature, every directory visited by the original
+    scan is re-stat'ed, so fonts added or removed in subdirectories are noticed.
+    """
+    try:
+        with open(_FONT_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get('signature') != signature:
+        return None
+    if not isinstance(cache.get('scanned'), list):
+        return None  # written before subdirectories were tracked
+    try:
+        for path, mtime in cache['scanned']:
+            if os.path.getmtime(path) != mtime:
+                return None
+    except (OSError, TypeError, ValueError):
+        return None
+    return cache.get('fonts')
+
+
+def _write_font_cache(signature: list, scanned: list, fonts: list[str]) -> None:
+    """Atomically store the font list; failures only cost a rescan next time."""
+    tmp_path = f"{_FONT_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_FONT_CACHE_FILE), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump({'signature': signature, 'scanned': scanned, 'fonts': fonts}, f)
+        os.replace(tmp_path, _FONT_CACHE_FILE)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
 # Try to find system fonts automatically
+@functools.lru_cache(maxsize=None)
 def find_system_fonts():
-    """Find available fonts on the system, prioritizing WSL/Ubuntu systems"""
+    """Find available fonts on the system, prioritizing WSL/Ubuntu systems
+
+    Fonts are matched by extension only; files that fail to load are skipped
+    later when the fonts are actually opened.
+    """
     fonts = []
     
     # Linux font directories (prioritized for WSL/Ubuntu)
@@ -45,76 +151,111 @@ def find_system_fonts():
     ]
     
     # Combine all directories
-    font_dirs = linux_font_dirs + windows_font_dirs
-    
-    print("🔍 Searching for fonts in system directories...")
-    
-    for font_dir in font_dirs:
-        # Expand user directory
-        expanded_dir = os.path.expanduser(font_dir) if font_dir.startswith('~') else font_dir
+    font_dirs = [os.path.expanduser(d) for d in linux_font_dirs + windows_font_dirs]
+    local_fonts_dir = os.path.join(os.getcwd(), 'fonts')
+
+    # Reuse the previous scan while no font directory (or subdirectory) has changed
+    signature = [[d, os.path.getmtime(d)] for d in font_dirs + [local_fonts_dir]
+                 if os.path.isdir(d)]
+    cached = _read_font_cache(signature)
+    if cached is not None:
+        _log(f"📦 Using cached font list: {_FONT_CACHE_FILE}")
+        fonts = cached
+    else:
+        _log("🔍 Searching for fonts in system directories...")
+        scanned = []
         
-        if os.path.exists(expanded_dir):
-            print(f"  📁 Checking: {expanded_dir}")
+        for expanded_dir in font_dirs:
+            if os.path.exists(expanded_dir):
+                _log(f"  📁 Checking: {expanded_dir}")
+                try:
+                    # Get all .ttf and .otf files
+                    for font_path in _scan_font_dir(expanded_dir, visited=scanned):
+                        fonts.append(font_path)
+                        _log(f"    ✅ Found: {os.path.basename(font_path)}")
+                except Exception as e:
+                    _log(f"    ❌ Error accessing {expanded_dir}: {e}")
+                    continue
+            else:
+                _log(f"    ⚠️  Directory not found: {expanded_dir}")
+        
+        # Check local fonts directory
+        if os.path.exists(local_fonts_dir):
+            _log(f"  📁 Checking local fonts directory: {local_fonts_dir}")
             try:
-                # Get all .ttf and .otf files
-                for root, dirs, files in os.walk(expanded_dir):
-                    for file in files:
-                        if file.lower().endswith(('.ttf', '.otf')):
-                            font_path = os.path.join(root, file)
-                            # Test if the font can be loaded
-                            try:
-                                test_font = truetype(font_path, 20)
-                                fonts.append(font_path)
-                                print(f"    ✅ Found: {file}")
-                            except Exception as e:
-                                # Skip fonts that can't be loaded
-                                continue
+                for font_path in _scan_font_dir(local_fonts_dir, recursive=False,
+                                                visited=scanned):
+                    fonts.append(font_path)
+                    _log(f"    ✅ Found local font: {os.path.basename(font_path)}")
             except Exception as e:
-                print(f"    ❌ Error accessing {expanded_dir}: {e}")
-                continue
+                _log(f"    ❌ Error accessing local fonts directory: {e}")
         else:
-            print(f"    ⚠️  Directory not found: {expanded_dir}")
-    
-    # Check local fonts directory
-    local_fonts_dir = os.path.join(os.getcwd(), 'fonts')
-    if os.path.exists(local_fonts_dir):
-        print(f"  📁 Checking local fonts directory: {local_fonts_dir}")
-        try:
-            for file in os.listdir(local_fonts_dir):
-                if file.lower().endswith(('.ttf', '.otf')):
-                    font_path = os.path.join(local_fonts_dir, file)
-                    try:
-                        test_font = truetype(font_path, 20)
-                        fonts.append(font_path)
-                        print(f"    ✅ Found local font: {file}")
-                    except Exception as e:
-                        print(f"    ❌ Could not load local font {file}: {e}")
-        except Exception as e:
-            print(f"    ❌ Error accessing local fonts directory: {e}")
-    else:
-        print(f"  ⚠️  Local fonts directory not found: {local_fonts_dir}")
-    
-    # Remove duplicates
-    fonts = list(set(fonts))
+            _log(f"  ⚠️  Local fonts directory not found: {local_fonts_dir}")
+        
+        # Remove duplicates
+        fonts = sorted(set(fonts))
+        _write_font_cache(signature, scanned, fonts)
     
     if fonts:
-        print(f"🎉 Total fonts found: {len(fonts)}")
-        print("📋 Font list:")
+        _log(f"🎉 Total fonts found: {len(fonts)}")
+        _log("📋 Font list:")
         for font in fonts[:10]:  # Show first 10 fonts
             font_name = os.path.basename(font)
-            print(f"    • {font_name}")
+            _log(f"    • {font_name}")
         if len(fonts) > 10:
-            print(f"    ... and {len(fonts) - 10} more fonts")
+            _log(f"    ... and {len(fonts) - 10} more fonts")
     else:
-        print("⚠️  No system fonts found! Will use PIL default font.")
+        _log("⚠️  No system fonts found! Will use PIL default font.")
     
-    return fonts if fonts else None
+    return tuple(fonts) if fonts else None
+
+
+@functools.lru_cache(maxsize=256)
+def _load_font(path: str, size: int) -> FreeTypeFont:
+    """Load a TrueType font, sharing one instance per (path, size) across captchas."""
+    return truetype(path, size)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_default_font():
+    """Load PIL's built-in font once."""
+    return load_default()
+
+
+@functools.lru_cache(maxsize=2048)
+def _glyph_size(c: str, font: FreeTypeFont) -> tuple[int, int]:
+    """Right/bottom extent of c drawn at (1, 1), as multiline_textbbox reports it."""
+    _, _, right, bottom = font.getbbox(c)
+    return 1 + right, 1 + bottom
+
+
+@functools.lru_cache(maxsize=4096)
+def _rasterize_glyph(c: str, font: FreeTypeFont) -> Image:
+    """Render a character as a tightly cropped 'L' coverage mask, once per font.
+
+    The returned image is shared between callers and must not be modified.
+    """
+    left, top, right, bottom = font.getbbox(c)
+    # Shift by the bbox origin so a negative left bearing (italics) is not clipped
+    mask = createImage('L', (max(1, int(right - left)), max(1, int(bottom - top))))
+    Draw(mask).text((-left, -top), c, font=font, fill=255)
+    return mask.crop(mask.getbbox())
+
+
+def _get_default_fonts() -> tuple[str, ...]:
+    """Default fonts - system fonts if any, else empty (PIL's default font is used).
+
+    Discovery runs on first use rather than at import, and is memoized by
+    find_system_fonts.
+    """
+    return find_system_fonts() or ()
+
 
-# Default fonts - try system fonts first, then fall back to built-in
-DEFAULT_FONTS = find_system_fonts()
-if not DEFAULT_FONTS:
-    # If no system fonts found, we'll use PIL's default font
-    DEFAULT_FONTS = []
+def __getattr__(name: str) -> t.Any:
+    # Keep DEFAULT_FONTS importable without scanning for fonts at import time
+    if name == 'DEFAULT_FONTS':
+        return _get_default_fonts()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class EnhancedImageCaptcha:
@@ -122,9 +263,8 @@ class EnhancedImageCaptcha:
     
     # Base configuration (Part 2)
     base_config = {
-        'lookup_table': [int(i * 1.97) for i in range(256)],
-        'character_offset_dx': (0, 4),
-        'character_offset_dy': (0, 6),
+        'character_offset_dx': (0, 4),  # Unused: glyphs are cached already cropped
+        'character_offset_dy': (0, 6),  # Unused: glyphs are cached already cropped
         'character_rotate': (-30, 30),
         'character_warp_dx': (0.1, 0.3),
         'character_warp_dy': (0.2, 0.3),
@@ -136,9 +276,8 @@ class EnhancedImageCaptcha:
     
     # Part 3 configuration (Medium degradation)
     medium_config = {
-        'lookup_table': [int(i * 1.97) for i in range(256)],
-        'character_offset_dx': (0, 6),
-        'character_offset_dy': (0, 8),
+        'character_offset_dx': (0, 6),  # Unused: glyphs are cached already cropped
+        'character_offset_dy': (0, 8),  # Unused: glyphs are cached already cropped
         'character_rotate': (-35, 35),
         'character_warp_dx': (0.1, 0.25),
         'character_warp_dy': (0.15, 0.25),
@@ -152,9 +291,8 @@ class EnhancedImageCaptcha:
     
     # Part 4 configuration (High degradation)
     hard_config = {
-        'lookup_table': [int(i * 1.97) for i in range(256)],
-        'character_offset_dx': (0, 8),
-        'character_offset_dy': (0, 10),
+        'character_offset_dx': (0, 8),  # Unused: glyphs are cached already cropped
+        'character_offset_dy': (0, 10),  # Unused: glyphs are cached already cropped
         'character_rotate': (-45, 45),
         'character_warp_dx': (0.15, 0.35),
         'character_warp_dy': (0.2, 0.35),
@@ -175,15 +313,24 @@ class EnhancedImageCaptcha:
                  height: int = 60,
                  fonts: list[str] | None = None,
                  font_sizes: tuple[int, ...] | None = None,
-                 difficulty: str = 'part2'):
+                 difficulty: str = 'part2',
+                 png_compress_level: int = 1,
+                 verbose: bool = True):
         self._width = width
         self._height = height
-        self._fonts = fonts or DEFAULT_FONTS
+        self._fonts = tuple(fonts) if fonts else _get_default_fonts()
         self._font_sizes = font_sizes or (30, 36, 42, 48)
         self.difficulty = difficulty
+        # Ensure minimum character size based on image dimensions
+        self._min_char_size = min(width // 8, height // 2)
+        # zlib level for PNG output; deflate dominates save time and training
+        # data rarely needs the smallest files (PIL's own default is 6)
+        self._png_compress_level = png_compress_level
+        # Worker copies pass verbose=False so only the parent reports its setup
+        self._verbose = verbose
         
         # Print font information during initialization
-        if not hasattr(EnhancedImageCaptcha, '_fonts_printed'):
+        if verbose and not hasattr(EnhancedImageCaptcha, '_fonts_printed'):
             print(f"\n🎨 Initializing Enhanced CAPTCHA Generator (Difficulty: {difficulty})")
             print("=" * 60)
             
@@ -214,113 +361,146 @@ class EnhancedImageCaptcha:
             self.config = self.hard_config.copy()
         else:
             self.config = self.base_config.copy()
+        self._refresh_config()
         
-        self._truefonts: list[FreeTypeFont] = []
+        self._truefonts: tuple[FreeTypeFont, ...] = ()
+        # Fonts at least as large as the minimum character size, filled in
+        # together with _truefonts
+        self._larger_fonts: tuple[FreeTypeFont, ...] = ()
         self._challenging_fonts: list[FreeTypeFont] = []
 
+        # Non-cryptographic RNG for visual jitter; text itself uses secrets
+        self._rng = np.random.default_rng()
+
+    def _refresh_config(self) -> None:
+        """Precompute the per-character jitter ranges from self.config.
+
+        Call again after modifying self.config in place.
+        """
+        self._rot_lo, rot_hi = self.config['character_rotate']
+        self._rot_range = rot_hi - self._rot_lo
+        self._wdx_lo, wdx_hi = self.config['character_warp_dx']
+        self._wdx_range = wdx_hi - self._wdx_lo
+        self._wdy_lo, wdy_hi = self.config['character_warp_dy']
+        self._wdy_range = wdy_hi - self._wdy_lo
+
     @property
-    def truefonts(self) -> list[FreeTypeFont]:
+    def truefonts(self) -> tuple[FreeTypeFont, ...]:
         if self._truefonts:
             return self._truefonts
-            
+
+        log = print if self._verbose else _log
         if self._fonts:
             try:
-                print(f"🔤 Loading fonts for size {self._font_sizes}...")
+                log(f"🔤 Loading fonts for size {self._font_sizes}...")
                 loaded_fonts = []
                 for font_path in self._fonts:
                     font_name = os.path.basename(font_path)
                     for size in self._font_sizes:
                         try:
-                            font = truetype(font_path, size)
+                            font = _load_font(font_path, size)
                             loaded_fonts.append(font)
                         except Exception as e:
-                            print(f"    ⚠️  Could not load {font_name} at size {size}: {e}")
+                            log(f"    ⚠️  Could not load {font_name} at size {size}: {e}")
                             continue
                 
                 if loaded_fonts:
-                    self._truefonts = loaded_fonts
-                    print(f"    ✅ Successfully loaded {len(loaded_fonts)} font instances")
+                    self._truefonts = tuple(loaded_fonts)
+                    log(f"    ✅ Successfully loaded {len(loaded_fonts)} font instances")
                 else:
-                    print("    ❌ Failed to load any fonts, using default")
-                    self._truefonts = [load_default()]
+                    log("    ❌ Failed to load any fonts, using default")
+                    self._truefonts = (_load_default_font(),)
                     
             except Exception as e:
-                print(f"    ❌ Font loading error: {e}")
-                self._truefonts = [load_default()]
+                log(f"    ❌ Font loading error: {e}")
+                self._truefonts = (_load_default_font(),)
         else:
-            print("    ⚠️  No fonts provided, using PIL default font")
-            self._truefonts = [load_default()]
+            log("    ⚠️  No fonts provided, using PIL default font")
+            self._truefonts = (_load_default_font(),)
+
+        # Precompute the fallback pool for characters that render too small
+        self._larger_fonts = tuple(f for f in self._truefonts
+                                   if getattr(f, 'size', 0) >= self._min_char_size)
             
         return self._truefonts
 
+    def load_fonts(self) -> tuple[FreeTypeFont, ...]:
+        """Load (and, if verbose, report) the fonts now instead of on first use."""
+        return self.truefonts
+
     def generate_text(self, length: int | None = None) -> str:
         """Generate random alphanumeric text of specified length (3-7 chars)."""
         if length is None:
-            length = secrets.randbelow(5) + 3  # 3-7 characters
-        return ''.join(secrets.choice(ALPHANUMERIC_CHARS) for _ in range(length))
+            length = _sysrand.randrange(3, 8)  # 3-7 characters
+        return ''.join(_sysrand.choices(ALPHANUMERIC_CHARS, k=length))
 
     def create_complex_background(self, image: Image) -> Image:
         """Create a complex background with gradients and patterns."""
         w, h = image.size
-        
-        # Create very subtle gradient background
-        for y in range(h):
-            for x in range(w):
-                # Create a much more subtle gradient
-                r = int(235 + (x / w) * 15)  # Very light gradient
-                g = int(240 + (y / h) * 10)
-                b = int(245 + ((x + y) / (w + h)) * 10)
-                image.putpixel((x, y), (min(255, r), min(255, g), min(255, b)))
-        
-        return image
 
-    def create_line_distractors(self, image: Image, color: ColorTuple, count: int = 2) -> Image:
+        # Create very subtle gradient background, built in one vectorized pass
+        xs = np.arange(w, dtype=np.float64)
+        ys = np.arange(h, dtype=np.float64)[:, None]
+        r = np.broadcast_to(235 + (xs / w) * 15, (h, w))  # Very light gradient
+        g = np.broadcast_to(240 + (ys / h) * 10, (h, w))
+        b = 245 + ((xs + ys) / (w + h)) * 10
+        arr = np.dstack([r, g, b])
+        arr = np.minimum(arr, 255).astype(np.uint8)
+
+        return fromarray(arr)
+
+    def create_line_distractors(self, image: Image, color: ColorTuple, count: int = 2,
+                                draw: ImageDraw | None = None) -> Image:
         """Add line distractors across the image."""
-        draw = Draw(image)
+        if draw is None:
+            draw = Draw(image)
         w, h = image.size
+
+        # Line type, two points and alpha for every line, drawn in one batch
+        params = self._rng.integers((3, w, h, w, h, 50), size=(count, 6)).tolist()
         
-        for _ in range(count):
-            # Random line type
-            line_type = secrets.randbelow(3)
-            
+        for line_type, px1, py1, px2, py2, alpha in params:
             if line_type == 0:  # Diagonal lines
-                x1, y1 = secrets.randbelow(w), secrets.randbelow(h)
-                x2, y2 = secrets.randbelow(w), secrets.randbelow(h)
+                x1, y1 = px1, py1
+                x2, y2 = px2, py2
             elif line_type == 1:  # Horizontal lines
-                y = secrets.randbelow(h)
+                y = py1
                 x1, x2 = 0, w
                 y1, y2 = y, y
             else:  # Vertical lines
-                x = secrets.randbelow(w)
+                x = px1
                 x1, x2 = x, x
                 y1, y2 = 0, h
             
             # Use lighter colors and thinner lines for less interference
             width = 1  # Always use thin lines
-            alpha = secrets.randbelow(50) + 30  # Lower alpha for subtlety
+            alpha += 30  # Lower alpha for subtlety
             line_color = (*color[:3], alpha) if len(color) == 3 else (*color[:3], alpha)
             
             draw.line([(x1, y1), (x2, y2)], fill=line_color, width=width)
         
         return image
 
-    def create_circular_distractors(self, image: Image, color: ColorTuple, count: int = 2) -> Image:
+    def create_circular_distractors(self, image: Image, color: ColorTuple, count: int = 2,
+                                    draw: ImageDraw | None = None) -> Image:
         """Add circular/elliptical distractors."""
-        draw = Draw(image)
+        if draw is None:
+            draw = Draw(image)
         w, h = image.size
+
+        # Position, radius and alpha for every circle, drawn in one batch
+        params = self._rng.integers((w, h, 15, 40), size=(count, 4)).tolist()
         
-        for _ in range(count):
+        for x, y, radius, alpha in params:
             # Random position and size
-            x = secrets.randbelow(w)
-            y = secrets.randbelow(h)
-            radius = secrets.randbelow(15) + 8  # Smaller circles
+            radius += 8  # Smaller circles
             
             # Create ellipse with random eccentricity
             x1, y1 = x - radius, y - radius
             x2, y2 = x + radius, y + radius
             
             # Use very light transparency
-            alpha = secrets.randbelow(40) + 20  # Very subtle
+            alpha += 20  # Very subtle
             circle_color = (*color[:3], alpha) if len(color) == 3 else color
             
             # Always use outline only for less interference
@@ -328,9 +508,11 @@ class EnhancedImageCaptcha:
         
         return image
 
-    def add_non_ascii_distractors(self, image: Image, color: ColorTuple, count: int = 1) -> Image:
+    def add_non_ascii_distractors(self, image: Image, color: ColorTuple, count: int = 1,
+                                  draw: ImageDraw | None = None) -> Image:
         """Add non-ASCII character distractors that look similar to alphanumeric chars."""
-        draw = Draw(image)
+        if draw is None:
+            draw = Draw(image)
         w, h = image.size
         
         # Limited set of specific non-ASCII characters
@@ -338,19 +520,19 @@ class EnhancedImageCaptcha:
         
         if self.truefonts:
             for _ in range(count):
-                char = secrets.choice(distractors)
+                char = distractors[int(self._rng.integers(len(distractors)))]
                 font = secrets.choice(self.truefonts)
                 
                 # Place distractors away from center where main text is
-                if secrets.randbelow(2):
-                    x = secrets.randbelow(w // 4)  # Left side
+                if self._rng.integers(2):
+                    x = int(self._rng.integers(w // 4))  # Left side
                 else:
-                    x = secrets.randbelow(w // 4) + 3 * w // 4  # Right side
+                    x = int(self._rng.integers(w // 4)) + 3 * w // 4  # Right side
                 
-                y = secrets.randbelow(h - 30)
+                y = int(self._rng.integers(h - 30))
                 
                 # Very low transparency for distractors
-                alpha = secrets.randbelow(40) + 30  # More subtle
+                alpha = int(self._rng.integers(40)) + 30  # More subtle
                 distractor_color = (*color[:3], alpha) if len(color) == 3 else color
                 
                 try:
@@ -362,82 +544,82 @@ class EnhancedImageCaptcha:
         return image
 
     @staticmethod
-    def create_noise_curve(image: Image, color: ColorTuple) -> Image:
+    def create_noise_curve(image: Image, color: ColorTuple,
+                           draw: ImageDraw | None = None) -> Image:
         """Create noise curves (enhanced version)."""
         w, h = image.size
-        x1 = secrets.randbelow(int(w / 5) + 1)
-        x2 = secrets.randbelow(w - int(w / 5) + 1) + int(w / 5)
-        y1 = secrets.randbelow(h - 2 * int(h / 5) + 1) + int(h / 5)
-        y2 = secrets.randbelow(h - y1 - int(h / 5) + 1) + y1
+        # All independent draws at once; y2's range depends on y1
+        x1, x2, y1, end, start, width = _noise_rng.integers(
+            (int(w / 5) + 1, w - int(w / 5) + 1, h - 2 * int(h / 5) + 1, 41, 21, 3)).tolist()
+        x2 += int(w / 5)
+        y1 += int(h / 5)
+        y2 = int(_noise_rng.integers(h - y1 - int(h / 5) + 1)) + y1
         points = [x1, y1, x2, y2]
-        end = secrets.randbelow(41) + 160
-        start = secrets.randbelow(21)
-        width = secrets.randbelow(3) + 1
-        Draw(image).arc(points, start, end, fill=color, width=width)
+        end += 160
+        width += 1
+        if draw is None:
+            draw = Draw(image)
+        draw.arc(points, start, end, fill=color, width=width)
         return image
 
     @staticmethod
-    def create_noise_dots(image: Image, color: ColorTuple, width: int = 2, number: int = 30) -> Image:
+    def create_noise_dots(image: Image, color: ColorTuple, width: int = 2, number: int = 30,
+                          draw: ImageDraw | None = None) -> Image:
         """Create noise dots (enhanced version)."""
-        draw = Draw(image)
         w, h = image.size
-        count = 0
-        while count < number:
-            x1 = secrets.randbelow(w + 1)
-            y1 = secrets.randbelow(h + 1)
-            
-            # Make dots smaller and lighter
-            dot_width = 1  # Always use small dots
-            
-            # Use lighter colors for dots
-            if len(color) >= 3:
-                light_color = (
-                    min(255, color[0] + 50),
-                    min(255, color[1] + 50), 
-                    min(255, color[2] + 50)
-                )
-            else:
-                light_color = color
-                
-            draw.line(((x1, y1), (x1, y1)), fill=light_color, width=dot_width)
-            count += 1
+
+        # Draw all dots at once: one batched RNG call and a single point() call
+        # (dots are always 1px; points on the far edge are clipped by PIL)
+        coords = _noise_rng.integers(0, (w + 1, h + 1), size=(number, 2))
+
+        # Use lighter colors for dots
+        if len(color) >= 3:
+            light_color = (
+                min(255, color[0] + 50),
+                min(255, color[1] + 50),
+                min(255, color[2] + 50)
+            )
+        else:
+            light_color = color
+
+        if draw is None:
+            draw = Draw(image)
+        draw.point(coords.ravel().tolist(), fill=light_color)
         return image
 
-    def _draw_character(self, c: str, draw: ImageDraw, color: ColorTuple) -> Image:
+    def _draw_character(self, c: str, color: ColorTuple) -> Image:
         """Draw a single character with transformations."""
         if c == " ":
             # Return a small transparent image for spaces
             return createImage('RGBA', (10, 10))
             
         font = secrets.choice(self.truefonts)
-        _, _, w, h = draw.multiline_textbbox((1, 1), c, font=font)
+        w, h = _glyph_size(c, font)
 
         # Ensure minimum character size based on image dimensions
-        min_char_size = min(self._width // 8, self._height // 2)
+        min_char_size = self._min_char_size
         if w < min_char_size or h < min_char_size:
             # Find a larger font size if character is too small
-            larger_fonts = [f for f in self.truefonts if f.size >= min_char_size]
+            larger_fonts = self._larger_fonts
             if larger_fonts:
                 font = secrets.choice(larger_fonts)
-                _, _, w, h = draw.multiline_textbbox((1, 1), c, font=font)
+                w, h = _glyph_size(c, font)
 
-        dx1 = secrets.randbelow(self.config['character_offset_dx'][1] - self.config['character_offset_dx'][0] + 1) + self.config['character_offset_dx'][0]
-        dy1 = secrets.randbelow(self.config['character_offset_dy'][1] - self.config['character_offset_dy'][0] + 1) + self.config['character_offset_dy'][0]
-        im = createImage('RGBA', (int(w) + dx1, int(h) + dy1))
-        Draw(im).text((dx1, dy1), c, font=font, fill=color)
+        glyph = _rasterize_glyph(c, font)
+
+        # Uniform draws for rotation and warp, pulled in one batch
+        u = self._rng.random(7)
 
         # Enhanced rotation based on difficulty
-        im = im.crop(im.getbbox())
-        rotation_angle = self.config['character_rotate'][0] + (secrets.randbits(32) / (2**32)) * (self.config['character_rotate'][1] - self.config['character_rotate'][0])
-        im = im.rotate(rotation_angle, Resampling.BILINEAR, expand=True)
+        rotation_angle = self._rot_lo + u[0] * self._rot_range
 
         # Enhanced warp based on difficulty
-        dx2 = w * (secrets.randbits(32) / (2**32)) * (self.config['character_warp_dx'][1] - self.config['character_warp_dx'][0]) + self.config['character_warp_dx'][0]
-        dy2 = h * (secrets.randbits(32) / (2**32)) * (self.config['character_warp_dy'][1] - self.config['character_warp_dy'][0]) + self.config['character_warp_dy'][0]
-        x1 = int(secrets.randbits(32) / (2**32) * (dx2 - (-dx2)) + (-dx2))
-        y1 = int(secrets.randbits(32) / (2**32) * (dy2 - (-dy2)) + (-dy2))
-        x2 = int(secrets.randbits(32) / (2**32) * (dx2 - (-dx2)) + (-dx2))
-        y2 = int(secrets.randbits(32) / (2**32) * (dy2 - (-dy2)) + (-dy2))
+        dx2 = w * u[1] * self._wdx_range + self._wdx_lo
+        dy2 = h * u[2] * self._wdy_range + self._wdy_lo
+        x1 = int(u[3] * (dx2 - (-dx2)) + (-dx2))
+        y1 = int(u[4] * (dy2 - (-dy2)) + (-dy2))
+        x2 = int(u[5] * (dx2 - (-dx2)) + (-dx2))
+        y2 = int(u[6] * (dy2 - (-dy2)) + (-dy2))
         w2 = w + abs(x1) + abs(x2)
         h2 = h + abs(y1) + abs(y2)
         data = (
@@ -446,8 +628,12 @@ class EnhancedImageCaptcha:
             w2 + x2, h2 + y2,
             w2 - x2, -y1,
         )
-        im = im.resize((w2, h2))
-        im = im.transform((int(w), int(h)), Transform.QUAD, data)
+        # Warp the single-channel coverage, then tint it once at output size
+        mask = glyph.transform((int(w), int(h)), Transform.QUAD,
+                               _fold_rotation(data, glyph.size, rotation_angle, (w2, h2)),
+                               Resampling.BILINEAR)
+        im = createImage('RGBA', mask.size)
+        im.paste(color, (0, 0) + mask.size, mask)
         return im
 
     def create_captcha_image(self, chars: str, color: ColorTuple, background: ColorTuple) -> Image:
@@ -459,14 +645,13 @@ class EnhancedImageCaptcha:
         if self.config.get('complex_background', False):
             image = self.create_complex_background(image)
         
-        draw = Draw(image)
         images: list[Image] = []
         
         # Generate character images
         for c in chars:
-            if secrets.randbits(32) / (2**32) > self.config['word_space_probability']:
-                images.append(self._draw_character(" ", draw, color))
-            images.append(self._draw_character(c, draw, color))
+            if self._rng.random() > self.config['word_space_probability']:
+                images.append(self._draw_character(" ", color))
+            images.append(self._draw_character(c, color))
 
         # Remove empty images (spaces)
         images = [im for im in images if im.size[0] > 0 and im.size[1] > 0]
@@ -489,12 +674,15 @@ class EnhancedImageCaptcha:
             # Scale characters if they're too small or too large
             if total_char_width < target_char_width:
                 scale_factor = target_char_width / total_char_width
+                # Bilinear is enough ahead of the final smoothing; keep bicubic
+                # for large upscales where bilinear starts to look soft
+                resample = Resampling.BILINEAR if scale_factor <= 1.5 else Resampling.BICUBIC
                 # Resize characters to better fit the image
                 scaled_images = []
                 for im in images:
                     new_width = int(im.size[0] * scale_factor)
                     new_height = int(im.size[1] * scale_factor)
-                    scaled_images.append(im.resize((new_width, new_height), Resampling.LANCZOS))
+                    scaled_images.append(im.resize((new_width, new_height), resample))
                 images = scaled_images
                 char_widths = [im.size[0] for im in images]
                 total_char_width = sum(char_widths)
@@ -513,21 +701,24 @@ class EnhancedImageCaptcha:
             overlap_reduction = int(spacing_per_gap * 0.3)  # Reduce spacing by 30%
             spacing_per_gap = max(5, spacing_per_gap - overlap_reduction)
 
+        # Vertical and horizontal jitter for every glyph, drawn in one batch
+        jitter = self._rng.integers(-5, 6, size=(num_chars, 2)).tolist()
+
         # Paste characters with proper spacing
         current_offset = start_offset
         for i, im in enumerate(images):
             w, h = im.size
             
             # Add some random vertical offset for more natural look
-            vertical_offset = int((self._height - h) / 2) + secrets.randbelow(11) - 5
+            vertical_offset = int((self._height - h) / 2) + jitter[i][0]
             vertical_offset = max(0, min(vertical_offset, self._height - h))
             
             # Add small horizontal random variation
-            horizontal_variation = secrets.randbelow(11) - 5
+            horizontal_variation = jitter[i][1]
             final_offset = max(0, current_offset + horizontal_variation)
             
-            mask = im.convert('L').point(self.config['lookup_table'])
-            image.paste(im, (final_offset, vertical_offset), mask)
+            # The glyph's own alpha is its mask, so no separate mask image is built
+            image.paste(im, (final_offset, vertical_offset), im)
             
             # Update offset for next character
             current_offset += w + spacing_per_gap
@@ -545,9 +736,12 @@ class EnhancedImageCaptcha:
 
         # Create base captcha image
         im = self.create_captcha_image(chars, color, background)
+
+        # One drawing context shared by every noise/distractor pass
+        draw = Draw(im)
         
         # Add noise dots (reduced intensity)
-        self.create_noise_dots(im, color, number=self.config['noise_dots'])
+        self.create_noise_dots(im, color, number=self.config['noise_dots'], draw=draw)
         
         # Add noise curves (lighter)
         for _ in range(self.config['noise_curves']):
@@ -560,22 +754,22 @@ class EnhancedImageCaptcha:
                 )
             else:
                 light_curve_color = color
-            self.create_noise_curve(im, light_curve_color)
+            self.create_noise_curve(im, light_curve_color, draw=draw)
         
         # Add line distractors (part3 and part4)
         if 'line_distractors' in self.config:
-            self.create_line_distractors(im, color, self.config['line_distractors'])
+            self.create_line_distractors(im, color, self.config['line_distractors'], draw=draw)
         
         # Add circular distractors (part4 only)
         if 'circular_distractors' in self.config:
-            self.create_circular_distractors(im, color, self.config['circular_distractors'])
+            self.create_circular_distractors(im, color, self.config['circular_distractors'], draw=draw)
         
         # Add non-ASCII distractors (part4 only)
         if 'non_ascii_distractors' in self.config:
-            self.add_non_ascii_distractors(im, color, self.config['non_ascii_distractors'])
+            self.add_non_ascii_distractors(im, color, self.config['non_ascii_distractors'], draw=draw)
         
         # Apply smooth filter (always apply for better text clarity)
-        im = im.filter(SMOOTH)
+        im = _smooth(im)
         
         return im
 
@@ -588,10 +782,41 @@ class EnhancedImageCaptcha:
             
         im = self.generate_image(chars, bg_color=bg_color, fg_color=fg_color)
         out = BytesIO()
-        im.save(out, format=format)
+        im.save(out, format=format, **self._save_options(format))
         out.seek(0)
         return out
 
+    def generate_batch(self, count: int, format: str = 'PNG',
+                       workers: int | None = None) -> list[tuple[str, BytesIO]]:
+        """Generate count random CAPTCHAs in parallel; returns (text, BytesIO) pairs.
+
+        Samples are independent, so each worker process gets its own copy of
+        this generator (fonts are reloaded there) and renders a share of them.
+        """
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, count // (4 * workers))
+        out = []
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_batch_worker,
+                                 initargs=(self,)) as executor:
+            for chars, data in executor.map(_generate_batch_sample,
+                                            [format] * count, chunksize=chunksize):
+                out.append((chars, BytesIO(data)))
+        return out
+
+    def __getstate__(self) -> dict[str, t.Any]:
+        state = self.__dict__.copy()
+        # FreeTypeFont objects don't pickle; they are reloaded on first use
+        state['_truefonts'] = ()
+        state['_larger_fonts'] = ()
+        # Unpickled copies get a fresh jitter stream instead of replaying this one
+        del state['_rng']
+        return state
+
+    def __setstate__(self, state: dict[str, t.Any]) -> None:
+        self.__dict__.update(state)
+        self._rng = np.random.default_rng()
+
     def write(self, chars: str | None = None, output: str = 'captcha.png', format: str = 'PNG',
               bg_color: ColorTuple | None = None,
               fg_color: ColorTuple | None = None) -> str:
@@ -600,9 +825,78 @@ class EnhancedImageCaptcha:
             chars = self.generate_text()
             
         im = self.generate_image(chars, bg_color=bg_color, fg_color=fg_color)
-        im.save(output, format=format)
+        im.save(output, format=format, **self._save_options(format))
         return chars
 
+    def _save_options(self, format: str) -> dict[str, t.Any]:
+        """Encoder options for Image.save in the given format."""
+        if format.upper() == 'PNG':
+            return {'compress_level': self._png_compress_level}
+        return {}
+
+
+# Per-process generator used by EnhancedImageCaptcha.generate_batch workers
+_batch_captcha: EnhancedImageCaptcha | None = None
+
+
+def _init_batch_worker(captcha: EnhancedImageCaptcha) -> None:
+    """Install this worker's copy of the generator."""
+    global _batch_captcha
+    # Under fork, initargs are inherited rather than unpickled, so every worker
+    # would otherwise replay the parent's jitter stream
+    captcha._rng = np.random.default_rng()
+    captcha._verbose = False
+    _batch_captcha = captcha
+
+
+def _generate_batch_sample(format: str) -> tuple[str, bytes]:
+    """Render one random CAPTCHA in a batch worker."""
+    chars = _batch_captcha.generate_text()
+    return chars, _batch_captcha.generate(chars, format=format).getvalue()
+
+
+def _fold_rotation(quad: tuple, size: tuple[int, int], angle: float,
+                   warp_size: tuple[int, int]) -> tuple[float, ...]:
+    """Map QUAD corners given on a (warp_size) canvas back onto the unrotated image.
+
+    Equivalent to rotate(angle, expand=True) -> resize(warp_size) -> QUAD, but lets
+    the glyph be resampled once: an affine map of a bilinear quad is still one.
+    """
+    w, h = size
+    theta = math.radians(angle)
+    cos_a, sin_a = math.cos(theta), math.sin(theta)
+
+    # Canvas size Image.rotate(expand=True) would produce
+    xx = [cos_a * x - sin_a * y for x, y in ((0, 0), (w, 0), (w, h), (0, h))]
+    yy = [sin_a * x + cos_a * y for x, y in ((0, 0), (w, 0), (w, h), (0, h))]
+    rw = math.ceil(max(xx)) - math.floor(min(xx))
+    rh = math.ceil(max(yy)) - math.floor(min(yy))
+
+    sx, sy = rw / warp_size[0], rh / warp_size[1]
+    out = []
+    for i in range(0, len(quad), 2):
+        # Undo the resize, then the rotation about the canvas centre
+        x = quad[i] * sx - rw / 2.0
+        y = quad[i + 1] * sy - rh / 2.0
+        out.append(cos_a * x - sin_a * y + w / 2.0)
+        out.append(sin_a * x + cos_a * y + h / 2.0)
+    return tuple(out)
+
+
+def _smooth(image: Image) -> Image:
+    """Apply PIL's SMOOTH filter with separable NumPy box sums (bit-identical).
+
+    SMOOTH is (3x3 box sum + 4 * centre) / 13, with the 1px border left as is.
+    """
+    if image.mode != 'RGB':
+        return image.filter(SMOOTH)
+    a = np.asarray(image, dtype=np.uint16)
+    out = a.copy()
+    rows = a[:-2] + a[1:-1] + a[2:]
+    box = rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:]
+    out[1:-1, 1:-1] = (box + 4 * a[1:-1, 1:-1] + 6) // 13  # +6 rounds to nearest
+    return fromarray(out.astype(np.uint8))
+
 
 def random_color(start: int, end: int, opacity: int | None = None) -> ColorTuple:
     """Generate random color."""